@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 from sqlalchemy import create_engine
 import os
+import datetime
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(page_title="Wireless Automation Dashboard", page_icon="📱", layout="wide")
@@ -24,32 +26,122 @@ def get_db_connection():
 engine = get_db_connection()
 
 # --- FETCH DATA ---
-@st.cache_data(ttl=5) # Refresh data every 5 seconds dynamically
-def load_data():
-    try:
-        # Load tables directly into Pandas DataFrames
-        df_results = pd.read_sql("SELECT * FROM results", engine)
-        df_devices = pd.read_sql("SELECT * FROM devices", engine)
-        return df_results, df_devices
-    except Exception as e:
-        st.error(f"Database connection error: {e}")
-        return pd.DataFrame(), pd.DataFrame()
-
-df_results, df_devices = load_data()
+# 'status' only ever holds PASS/FAIL, so it is read as a categorical (int8 codes) rather than strings
+STATUS_DTYPE = pd.CategoricalDtype(categories=['PASS', 'FAIL'])
+
+# Aggregates are computed inside PostgreSQL so only a handful of rows cross the wire.
+# Each query is cached on its own TTL so slow-moving views aren't refetched every rerun.
+# Loaders raise on DB errors instead of returning empty frames, so failures are never cached.
+# Frames are Arrow-backed (pandas 2.x) so st.dataframe can ship them without a pandas->Arrow conversion.
+@st.cache_data(ttl=30, max_entries=4) # Periodic resync point for the incremental counters
+def load_snapshot():
+    # One statement so the per-test totals and the result_id cursor come from the same snapshot.
+    # taken_at tells sessions when the cache has refetched, so they know to reseed from it.
+    taken_at = datetime.datetime.now()
+    df = pd.read_sql("""
+        SELECT test_name,
+               COUNT(*) AS count,
+               COUNT(*) FILTER (WHERE status = 'PASS') AS passed,
+               SUM(duration_sec) AS sum_dur,
+               MAX(result_id) AS max_id
+        FROM results
+        GROUP BY test_name
+    """, engine, dtype_backend="pyarrow")
+    return taken_at, df
+
+@st.cache_data(ttl=5, max_entries=16) # Refresh new results every 5 seconds dynamically
+def load_new_results(last_id):
+    # Only rows written since this session's cursor, walked via the result_id primary key
+    df = pd.read_sql("""
+        SELECT result_id, test_name, status, duration_sec
+        FROM results
+        WHERE result_id > %(last_id)s
+        ORDER BY result_id
+    """, engine, dtype_backend="pyarrow", params={"last_id": last_id})
+    df['status'] = df['status'].astype(STATUS_DTYPE)
+    return df
+
+@st.cache_data(ttl=5, max_entries=4)
+def load_recent_results(n=10):
+    # Backed by idx_results_timestamp so this is an index scan rather than a full sort
+    df = pd.read_sql("""
+        SELECT test_name, device_id, status, duration_sec
+        FROM results
+        ORDER BY timestamp DESC
+        LIMIT %(n)s
+    """, engine, dtype_backend="pyarrow", params={"n": n})
+    df['status'] = df['status'].astype(STATUS_DTYPE)
+    return df
+
+@st.cache_data(ttl=10)
+def load_devices():
+    return pd.read_sql("SELECT device_id, status, updated_at FROM devices", engine, dtype_backend="pyarrow")
+
+# --- INCREMENTAL STATE ---
+# Running counters live in session_state; each rerun only folds in rows past 'last_id'
+state = st.session_state
+state.setdefault("counters", {"total": 0, "pass": 0, "sum_dur": 0.0})
+state.setdefault("by_test", {})  # test_name -> [count, sum_duration]
+
+def seed_counters(snapshot):
+    counters = {"total": 0, "pass": 0, "sum_dur": 0.0}
+    by_test = {}
+    for row in snapshot.itertuples(index=False):
+        counters["total"] += int(row.count)
+        counters["pass"] += int(row.passed)
+        counters["sum_dur"] += float(row.sum_dur)
+        by_test[row.test_name] = [int(row.count), float(row.sum_dur)]
+    state["counters"], state["by_test"] = counters, by_test
+    state["last_id"] = int(snapshot['max_id'].max()) if not snapshot.empty else 0
+
+def update_counters():
+    # SERIAL ids follow insert order, not commit order, so a cursor can skip rows committed late
+    # behind it, and it goes stale if the tables are recreated. Rebuilding from every fresh
+    # snapshot bounds either drift to one snapshot TTL.
+    taken_at, snapshot = load_snapshot()
+    if state.get("snapshot_taken_at") != taken_at:
+        seed_counters(snapshot)
+        state["snapshot_taken_at"] = taken_at
+
+    counters, by_test = state["counters"], state["by_test"]
+    new_results = load_new_results(state["last_id"])
+    if new_results.empty:
+        return
+    # Total is the raw row count, matching the seed's COUNT(*); value_counts drops statuses
+    # outside PASS/FAIL (NaN after the categorical cast), so it is only used for the PASS count
+    counters["total"] += len(new_results)
+    status_counts = new_results['status'].value_counts()
+    counters["pass"] += int(status_counts.get('PASS', 0))
+    counters["sum_dur"] += float(new_results['duration_sec'].to_numpy().sum())
+    per_test = new_results.groupby('test_name')['duration_sec'].agg(['count', 'sum'])
+    for test_name, count, sum_dur in per_test.itertuples():
+        entry = by_test.setdefault(test_name, [0, 0.0])
+        entry[0] += int(count)
+        entry[1] += float(sum_dur)
+    state["last_id"] = int(new_results['result_id'].iloc[-1])
+
+try:
+    update_counters()
+    recent_results = load_recent_results()
+    df_devices = load_devices()
+except Exception as e:
+    st.error(f"Database connection error: {e}")
+    recent_results = df_devices = pd.DataFrame()
 
 # --- DASHBOARD UI ---
 st.title("📱 Apple Wireless Automation Dashboard")
 st.markdown("Real-time metrics for hardware test execution layers and device statuses.")
 
-if df_results.empty or df_devices.empty:
+counters = state["counters"]
+if counters["total"] == 0 or df_devices.empty:
     st.warning("No data found in PostgreSQL. Please run `python main.py` to generate test data.")
 else:
     # --- METRICS ROW ---
-    total_tests = len(df_results)
-    passed_tests = len(df_results[df_results['status'] == 'PASS'])
+    total_tests = counters["total"]
+    passed_tests = counters["pass"]
     failed_tests = total_tests - passed_tests
     pass_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
-    avg_duration = df_results['duration_sec'].mean()
+    avg_duration = counters["sum_dur"] / total_tests
     
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Tests Executed", total_tests)
@@ -60,32 +152,41 @@ else:
     st.markdown("---")
     
     # --- CHARTS ROW ---
+    # Figures are built once per session and only have their trace data swapped on each rerun
+    if "fig_pie" not in state:
+        state["fig_pie"] = go.Figure(go.Pie(
+            labels=['PASS', 'FAIL'],
+            values=[0, 0],
+            hole=0.4,
+            marker_colors=['#00d26a', '#f8312f'],
+            sort=False
+        ))
+        state["fig_bar"] = go.Figure(go.Bar(x=[], y=[]))
+        state["fig_bar"].update_layout(
+            title="Average Execution Time (Seconds)",
+            xaxis_title="test_name",
+            yaxis_title="duration_sec"
+        )
+
     col_chart1, col_chart2 = st.columns(2)
     
     with col_chart1:
         st.subheader("Test Results Status")
-        # Plotly Pie Chart mapping pass/fails
-        fig_pie = px.pie(
-            df_results, 
-            names='status', 
-            hole=0.4,
-            color='status',
-            color_discrete_map={'PASS':'#00d26a', 'FAIL':'#f8312f'}
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        # Plotly Pie Chart mapping pass/fails from the running counters
+        fig_pie = state["fig_pie"]
+        fig_pie.data[0].values = [passed_tests, failed_tests]
+        st.plotly_chart(fig_pie, use_container_width=True, key="pie")
         
     with col_chart2:
         st.subheader("Test Execution Duration by Type")
         # Bar chart comparing duration times across different test types
-        duration_avg = df_results.groupby('test_name')['duration_sec'].mean().reset_index()
-        fig_bar = px.bar(
-            duration_avg, 
-            x='test_name', 
-            y='duration_sec',
-            color='test_name',
-            title="Average Execution Time (Seconds)"
-        )
-        st.plotly_chart(fig_bar, use_container_width=True)
+        test_names = sorted(state["by_test"])
+        palette = px.colors.qualitative.Plotly
+        fig_bar = state["fig_bar"]
+        fig_bar.data[0].x = test_names
+        fig_bar.data[0].y = [state["by_test"][name][1] / state["by_test"][name][0] for name in test_names]
+        fig_bar.data[0].marker.color = [palette[i % len(palette)] for i in range(len(test_names))]
+        st.plotly_chart(fig_bar, use_container_width=True, key="bar")
         
     st.markdown("---")
     
@@ -95,10 +196,9 @@ else:
     with col_table1:
         st.subheader("Live Device Fleet Status")
         # Display the devices dataframe
-        st.dataframe(df_devices[['device_id', 'status', 'updated_at']], use_container_width=True, hide_index=True)
+        st.dataframe(df_devices, use_container_width=True, hide_index=True)
         
     with col_table2:
         st.subheader("Recent Test Executions")
         # Display the most recent 10 results
-        recent_results = df_results.sort_values(by='timestamp', ascending=False).head(10)
-        st.dataframe(recent_results[['test_name', 'device_id', 'status', 'duration_sec']], use_container_width=True, hide_index=True)
+        st.dataframe(recent_results, use_container_width=True, hide_index=True)
@@ -1,12 +1,37 @@
-import psycopg2
-from pymongo import MongoClient
-from elasticsearch import Elasticsearch
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import os
 import datetime
+import threading
 import traceback
+import weakref
+from contextlib import contextmanager
+
+# Hot-path statements, prepared once per pooled connection so Postgres plans them a single time
+PG_PREPARED_STATEMENTS = (
+    """
+    PREPARE upsert_device (VARCHAR, VARCHAR, TIMESTAMP) AS
+    INSERT INTO devices (device_id, status, updated_at)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (device_id) DO UPDATE
+    SET status = EXCLUDED.status, updated_at = EXCLUDED.updated_at
+    """,
+    """
+    PREPARE update_status (VARCHAR, TIMESTAMP, VARCHAR) AS
+    UPDATE devices SET status = $1, updated_at = $2 WHERE device_id = $3
+    """,
+)
+
+# "host|index" pairs whose cluster and index were already verified by ElasticsearchDB.connect()
+_ES_INIT_CACHE: set[str] = set()
 
 class PostgresDB:
     """Handles all PostgreSQL interactions for the tracking framework."""
+    __slots__ = (
+        "host", "port", "user", "password", "dbname",
+        "minconn", "maxconn", "pool", "_slots", "_prepared", "_pending_results",
+    )
+
     def __init__(self):
         # Database connection configuration from environment variables (useful for CI/CD)
         self.host = os.getenv("PG_HOST", "localhost")
@@ -14,22 +39,51 @@ class PostgresDB:
         self.user = os.getenv("PG_USER", "postgres")
         self.password = os.getenv("PG_PASSWORD", "postgres")
         self.dbname = os.getenv("PG_DB", "postgres")
-        self.conn = None
+        # minconn == maxconn: the pool closes any returned connection above minconn, which would
+        # discard its prepared statements and reconnect under the runner's to_thread load
+        self.maxconn = 16
+        self.minconn = self.maxconn
+        self.pool = None
+        # ThreadedConnectionPool raises when exhausted, so callers queue on this instead
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        # Pooled connections that already hold the PG_PREPARED_STATEMENTS
+        self._prepared = weakref.WeakSet()
+        # Finished test rows waiting to be written in a single batch by flush_results()
+        self._pending_results: list[tuple] = []
 
     def connect(self):
-        """Connect to the PostgreSQL database."""
-        self.conn = psycopg2.connect(
+        """Open a thread-safe connection pool to the PostgreSQL database."""
+        self.pool = ThreadedConnectionPool(
+            self.minconn,
+            self.maxconn,
             host=self.host, 
             port=self.port, 
             user=self.user, 
             password=self.password, 
             dbname=self.dbname
         )
-        self.conn.autocommit = True
+
+    @contextmanager
+    def _cursor(self, prepare: bool = True):
+        """Borrow a pooled connection for one call and hand it back as soon as the block exits."""
+        with self._slots:
+            conn = self.pool.getconn()
+            try:
+                conn.autocommit = True
+                # PREPARE needs the tables to exist, so init_tables() opts out
+                if prepare and conn not in self._prepared:
+                    with conn.cursor() as cur:
+                        for statement in PG_PREPARED_STATEMENTS:
+                            cur.execute(statement)
+                    self._prepared.add(conn)
+                with conn.cursor() as cur:
+                    yield cur
+            finally:
+                self.pool.putconn(conn, close=bool(conn.closed))
 
     def init_tables(self):
         """Create devices, tests, and results tables if they do not exist."""
-        with self.conn.cursor() as cur:
+        with self._cursor(prepare=False) as cur:
             # 1. Devices table: tracks device status (AVAILABLE, RUNNING, etc.)
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS devices (
@@ -58,64 +112,84 @@ class PostgresDB:
                     timestamp TIMESTAMP
                 )
             """)
+            # Indexes backing the dashboard queries:
+            # "most recent results" walks the timestamp index instead of sorting
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results (timestamp DESC)")
+            # per-test duration aggregates can be answered from the index alone
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_results_test_duration ON results (test_name) INCLUDE (duration_sec)")
+            # PASS/FAIL filtering and counts
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_results_status ON results (status)")
 
-    def register_device(self, device_id: str, status: str):
+    def register_device(self, device_id: str, status: str, timestamp: datetime.datetime | None = None):
         """Upsert a device's status into the devices table initially."""
-        with self.conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO devices (device_id, status, updated_at) 
-                VALUES (%s, %s, %s) 
-                ON CONFLICT (device_id) DO UPDATE 
-                SET status = EXCLUDED.status, updated_at = EXCLUDED.updated_at
-            """, (device_id, status, datetime.datetime.now()))
+        if timestamp is None:
+            timestamp = datetime.datetime.now()
+        with self._cursor() as cur:
+            cur.execute("EXECUTE upsert_device (%s, %s, %s)", (device_id, status, timestamp))
 
-    def update_device_status(self, device_id: str, status: str):
+    def update_device_status(self, device_id: str, status: str, timestamp: datetime.datetime | None = None):
         """Update just the status of an existing device during test runs."""
-        with self.conn.cursor() as cur:
-            cur.execute(
-                "UPDATE devices SET status = %s, updated_at = %s WHERE device_id = %s",
-                (status, datetime.datetime.now(), device_id)
-            )
+        if timestamp is None:
+            timestamp = datetime.datetime.now()
+        with self._cursor() as cur:
+            cur.execute("EXECUTE update_status (%s, %s, %s)", (status, timestamp, device_id))
 
-    def log_result(self, test_name: str, device_id: str, status: str, duration: float, error: str):
-        """Writes result to both tests and results tables after a test finishes."""
-        with self.conn.cursor() as cur:
-            now = datetime.datetime.now()
-            # First, record the fact that this test was executed in the 'tests' table
-            cur.execute(
-                "INSERT INTO tests (test_name, created_at) VALUES (%s, %s)", 
-                (test_name, now)
-            )
-            # Next, insert the precise outcome in the 'results' table
-            cur.execute("""
+    def log_result(self, test_name: str, device_id: str, status: str, duration: float, error: str,
+                   timestamp: datetime.datetime | None = None):
+        """Buffers a finished test for the tests and results tables; written on flush_results()."""
+        if timestamp is None:
+            timestamp = datetime.datetime.now()
+        self._pending_results.append((test_name, device_id, status, duration, error, timestamp))
+
+    def flush_results(self):
+        """Writes all buffered results to both tables in one round-trip per page of rows."""
+        if not self._pending_results:
+            return
+        with self._cursor() as cur:
+            # A single CTE statement populates 'tests' and 'results' from the same VALUES batch
+            execute_values(cur, """
+                WITH batch (test_name, device_id, status, duration_sec, error, ts) AS (VALUES %s),
+                ins AS (
+                    INSERT INTO tests (test_name, created_at)
+                    SELECT test_name, ts FROM batch
+                )
                 INSERT INTO results (test_name, device_id, status, duration_sec, error, timestamp)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (test_name, device_id, status, duration, error, now))
-            
+                SELECT test_name, device_id, status, duration_sec, error, ts FROM batch
+            """, self._pending_results, page_size=500)
+            # Refresh planner statistics so the new rows are costed against the indexes above
+            cur.execute("ANALYZE results")
+        self._pending_results.clear()
+
     def close(self):
-        """Safely close the connection."""
-        if self.conn:
-            self.conn.close()
+        """Safely close every pooled connection."""
+        if self.pool:
+            self.pool.closeall()
 
 
 class MongoDB:
     """Handles all MongoDB interactions for raw log ingestion."""
+    __slots__ = ("uri", "client", "db", "logs", "_buffer")
+
     def __init__(self):
         # Allow Mongo URI to be overridden by CI environment variables
         self.uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
         self.client = None
         self.db = None
         self.logs = None
+        # Log documents waiting to be written in a single insert_many by flush()
+        self._buffer: list[dict] = []
 
     def connect(self):
         """Connect to the MongoDB server."""
+        # Imported here so modules that never talk to MongoDB don't pay for loading pymongo
+        from pymongo import MongoClient
         self.client = MongoClient(self.uri)
         self.db = self.client["framework_db"]
         # Creating or connecting to the 'test_logs' collection directly
         self.logs = self.db["test_logs"]
 
     def write_log(self, test_name: str, device_id: str, status: str, duration: float, error: str, timestamp: datetime.datetime):
-        """Writes a raw log document for a given test execution directly to MongoDB."""
+        """Buffers a raw log document for a given test execution; written to MongoDB on flush()."""
         doc = {
             "test_name": test_name,
             "device_id": device_id,
@@ -124,7 +198,15 @@ class MongoDB:
             "error": error,
             "timestamp": timestamp
         }
-        self.logs.insert_one(doc)
+        self._buffer.append(doc)
+
+    def flush(self):
+        """Write all buffered log documents in one unordered insert_many call."""
+        if not self._buffer:
+            return
+        # ordered=False lets mongod apply the batch without stopping at the first failed document
+        self.logs.insert_many(self._buffer, ordered=False)
+        self._buffer.clear()
 
     def close(self):
         """Safely close the MongoDB client."""
@@ -139,20 +221,39 @@ class ElasticsearchDB:
     to collect and transform logs. For this framework, we write directly from Python
     which is simpler and gives us more control over the document structure.
     """
+    __slots__ = ("es_host", "index_name", "client", "_pending")
+
     def __init__(self):
         self.es_host = os.getenv("ES_HOST", "http://localhost:9200")
         self.index_name = "wireless-test-logs"
         self.client = None
+        # Documents waiting to be sent in a single _bulk request by flush()
+        self._pending: list[dict] = []
 
     def connect(self):
         """Connect to the Elasticsearch cluster."""
-        self.client = Elasticsearch(self.es_host)
+        # Imported here so modules that never talk to Elasticsearch don't pay for loading the client
+        from elasticsearch import Elasticsearch
+        # Gzip request bodies so bulk payloads are compressed on the wire, and fail fast
+        # on a dead cluster instead of retrying through the default timeouts
+        self.client = Elasticsearch(
+            self.es_host,
+            http_compress=True,
+            request_timeout=2,
+            max_retries=1,
+            retry_on_timeout=False
+        )
+        # Skip the ping/index checks if this process already verified this cluster and index
+        cache_key = f"{self.es_host}|{self.index_name}"
+        if cache_key in _ES_INIT_CACHE:
+            return
         # Verify the connection is alive
         if not self.client.ping():
             raise ConnectionError("Cannot connect to Elasticsearch")
-        # Create the index with proper mappings if it doesn't exist
+        # Create the index with proper mappings if it doesn't exist; creation waits for shard
+        # allocation, so it gets a longer timeout than the fail-fast client default
         if not self.client.indices.exists(index=self.index_name):
-            self.client.indices.create(
+            self.client.options(request_timeout=30).indices.create(
                 index=self.index_name,
                 mappings={
                     "properties": {
@@ -167,11 +268,12 @@ class ElasticsearchDB:
                     }
                 }
             )
+        _ES_INIT_CACHE.add(cache_key)
 
     def index_log(self, test_name: str, device_id: str, status: str, 
                   duration: float, error: str, stack_trace: str,
                   timestamp: datetime.datetime):
-        """Index a log document into Elasticsearch for full-text search via Kibana."""
+        """Buffer a log document for Elasticsearch; sent to the index on flush()."""
         doc = {
             "test_name": test_name,
             "device_id": device_id,
@@ -182,7 +284,15 @@ class ElasticsearchDB:
             "log_level": "ERROR" if status == "FAIL" else "INFO",
             "timestamp": timestamp.isoformat()
         }
-        self.client.index(index=self.index_name, document=doc)
+        self._pending.append({"_index": self.index_name, "_source": doc})
+
+    def flush(self):
+        """Send all buffered log documents to Elasticsearch in one bulk request."""
+        if not self._pending:
+            return
+        from elasticsearch.helpers import bulk
+        bulk(self.client.options(request_timeout=30), self._pending, chunk_size=500)
+        self._pending.clear()
 
     def close(self):
         """Safely close the Elasticsearch client."""
@@ -1,4 +1,6 @@
 import asyncio
+import datetime
+import numpy as np
 from database import PostgresDB, MongoDB, ElasticsearchDB
 from test_runner import AsyncTestRunner
 
@@ -22,8 +24,9 @@ async def main():
     
     # 1. Create 10 fake devices & register in PostgreSQL as AVAILABLE
     devices = [f"device_iphone_{str(i).zfill(3)}" for i in range(1, 11)]
+    registered_at = datetime.datetime.now()
     for device in devices:
-        pg_db.register_device(device, "AVAILABLE")
+        pg_db.register_device(device, "AVAILABLE", registered_at)
     print("✅ 10 devices registered natively in PostgreSQL")
     
     # 2. Creates 3 test types across all devices building combinations
@@ -40,33 +43,31 @@ async def main():
     final_results = await runner.run_all(test_requests)
     
     # 4. Print final mathematical summary
-    print("\n--- Final Test Results Summary ---")
+    # Single pass into native numpy arrays; gather() exceptions count as failures with no duration
+    statuses = np.fromiter(
+        (0 if isinstance(res, Exception) or res.get("status") != "PASS" else 1 for res in final_results),
+        dtype=np.int8, count=len(final_results)
+    )
+    durations = np.fromiter(
+        (0.0 if isinstance(res, Exception) else res.get("duration", 0.0) for res in final_results),
+        dtype=np.float64, count=len(final_results)
+    )
     total = len(test_requests)
-    passed = 0
-    failed = 0
-    total_duration = 0.0
-    
-    for res in final_results:
-        # Check if Python threw a root level runtime exception inside gather
-        if isinstance(res, Exception):
-            print(f"CRITICAL ERROR AVERTED: {res}")
-            failed += 1
-            continue
-            
-        if res.get("status") == "PASS":
-            passed += 1
-        else:
-            failed += 1
-            
-        total_duration += res.get("duration", 0)
-        
-    avg_duration = total_duration / total if total > 0 else 0
-    
-    print(f"Total Tests Run: {total}")
-    print(f"Passed: {passed} ✅")
-    print(f"Failed: {failed} ❌")
-    print(f"Average Duration: {avg_duration:.2f} seconds")
-    print("----------------------------------\n")
+    passed = int(statuses.sum())
+    failed = len(statuses) - passed
+    avg_duration = float(durations.mean()) if total > 0 else 0
+
+    # Check if Python threw a root level runtime exception inside gather
+    report = [f"CRITICAL ERROR AVERTED: {res}" for res in final_results if isinstance(res, Exception)]
+    report += [
+        "\n--- Final Test Results Summary ---",
+        f"Total Tests Run: {total}",
+        f"Passed: {passed} ✅",
+        f"Failed: {failed} ❌",
+        f"Average Duration: {avg_duration:.2f} seconds",
+        "----------------------------------\n",
+    ]
+    print("\n".join(report))
 
     # Safe Cleanup
     pg_db.close()
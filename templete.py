@@ -1,31 +1,23 @@
-from time import time
+from time import time, perf_counter
 import datetime
+import logging
 from abc import ABC, abstractmethod
 
-def retry(times=3):
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            attempts = 0
-            while attempts < times:
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    attempts += 1
-                    print(f"Attempt {attempts} failed: {e}")
-                    if attempts == times:
-                        raise e
-        return wrapper
-    return decorator
-    
+logger = logging.getLogger(__name__)
+
+# Log per-run timings from BaseTest.run when enabled
+DEBUG = False
 
-def log_time(func):        
-    def wrapper(*args, **kwargs):
-        start = time()
-        result = func(*args, **kwargs) 
-        end = time()
-        print(f"Ran for {end - start}")      
-        return result     
-    return wrapper
+def run_with_retry(test, times=3):
+    attempts = 0
+    while attempts < times:
+        try:
+            return test.run()
+        except Exception as e:
+            attempts += 1
+            logger.warning("Attempt %d failed: %s", attempts, e)
+            if attempts == times:
+                raise e
 
 class BaseTest(ABC):
     def __init__(self, device):
@@ -33,18 +25,22 @@ class BaseTest(ABC):
         self.status = "PENDING"   
         self.start_time = None  
         self.end_time = None  
+        # Monotonic counter for 'duration'; start_time/end_time stay wall-clock timestamps
+        self._perf_start = None
         
-    @retry(times = 3)
-    @log_time
     def run(self):
         self.start()
         self.processing()
-        return self.exit()
+        result = self.exit()
+        if DEBUG:
+            logger.info("Ran for %s", result['duration'])
+        return result
     
     
     def start(self):
         self.status = "STARTING"
         self.start_time = time() 
+        self._perf_start = perf_counter()
     
     @abstractmethod
     def processing(self):
@@ -53,27 +49,29 @@ class BaseTest(ABC):
     def exit(self):
         self.status = "DONE"
         self.end_time = time()
+        duration = perf_counter() - self._perf_start
         return {
             "status": self.status,
             "device": self.device,
             "start_time": self.start_time,
             "end_time": self.end_time,
-            "duration": self.end_time - self.start_time
+            "duration": duration
         }
         
 
 
 class WiFiSpeedTest(BaseTest):
     def processing(self):
-        print(f"WiFi speed test running on {self.device}")
+        # Lazy %-args: the message is only formatted if INFO is enabled
+        logger.info("WiFi speed test running on %s", self.device)
 
 class WiFiLatencyTest(BaseTest):
     def processing(self):
-        print(f"WiFi latency test running on {self.device}")
+        logger.info("WiFi latency test running on %s", self.device)
 
 class BluetoothTest(BaseTest):
     def processing(self):
-        print(f"Bluetooth test running on {self.device}")
+        logger.info("Bluetooth test running on %s", self.device)
 
 class TestFactory:
     registry = {
@@ -91,7 +89,9 @@ class TestFactory:
         return self.registry[self.test_name](device)
     
 
-test = TestFactory("wifi_speed")
-test = test.process("iPhone 11")
-output = test.run()
-print(output)
\ No newline at end of file
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    test = TestFactory("wifi_speed")
+    test = test.process("iPhone 11")
+    output = run_with_retry(test, times=3)
+    logger.info("%s", output)
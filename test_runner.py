@@ -2,16 +2,25 @@ import asyncio
 import logging
 import time
 import datetime
-import random
 import traceback
 from abc import ABC, abstractmethod
+import numpy as np
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+FAILURE_RATE = 0.1 # 10% failure chance per simulated test
+
 class BaseTest(ABC):
     """Base abstract class that all tests will inherit from."""
-    def __init__(self, device_id: str):
+    # (min, max) simulated execution time in seconds, overridden per test type
+    DURATION_RANGE = (0.0, 0.0)
+
+    def __init__(self, device_id: str, duration_sample: float, will_fail: bool):
         self.device_id = device_id
+        # duration_sample is a pre-drawn uniform value in [0, 1) scaled into this test's range
+        low, high = self.DURATION_RANGE
+        self.duration = low + duration_sample * (high - low)
+        self.will_fail = will_fail
         
     @abstractmethod
     async def run(self) -> dict:
@@ -20,71 +29,85 @@ class BaseTest(ABC):
 
 # -- Three Example Test Types for the Interview -- #
 class PerformanceTest(BaseTest):
+    DURATION_RANGE = (0.5, 1.0)
+
     async def run(self) -> dict:
         logging.info(f"[{self.device_id}] Starting PerformanceTest...")
-        await asyncio.sleep(random.uniform(0.5, 1.0)) 
-        if random.random() < 0.1: # 10% failure chance
+        await asyncio.sleep(self.duration) 
+        if self.will_fail:
             raise RuntimeError("Performance drop detected in memory profile")
         return {"status": "PASS", "device_id": self.device_id, "test_name": "PerformanceTest"}
 
 class ConnectivityTest(BaseTest):
+    DURATION_RANGE = (0.5, 1.5)
+
     async def run(self) -> dict:
         logging.info(f"[{self.device_id}] Starting ConnectivityTest...")
-        await asyncio.sleep(random.uniform(0.5, 1.5)) 
-        if random.random() < 0.1:
+        await asyncio.sleep(self.duration) 
+        if self.will_fail:
             raise ConnectionError("Wireless AP connection lost randomly")
         return {"status": "PASS", "device_id": self.device_id, "test_name": "ConnectivityTest"}
 
 class StabilityTest(BaseTest):
+    DURATION_RANGE = (1.0, 2.0)
+
     async def run(self) -> dict:
         logging.info(f"[{self.device_id}] Starting StabilityTest...")
-        await asyncio.sleep(random.uniform(1.0, 2.0)) 
-        if random.random() < 0.1:
+        await asyncio.sleep(self.duration) 
+        if self.will_fail:
             raise ValueError("Unexpected springboard crash on iOS device")
         return {"status": "PASS", "device_id": self.device_id, "test_name": "StabilityTest"}
 
 
 class TestFactory:
     """Factory to create test instances based on the test name."""
+    # Built once at class definition instead of on every create_test() call
+    _REGISTRY = {
+        "performance_test": PerformanceTest,
+        "connectivity_test": ConnectivityTest,
+        "stability_test": StabilityTest,
+    }
+
     @staticmethod
-    def create_test(test_name: str, device_id: str) -> BaseTest:
-        tests_registry = {
-            "performance_test": PerformanceTest,
-            "connectivity_test": ConnectivityTest,
-            "stability_test": StabilityTest,
-        }
-        
-        test_class = tests_registry.get(test_name.lower())
-        if not test_class:
+    def create_test(test_name: str, device_id: str, duration_sample: float, will_fail: bool) -> BaseTest:
+        test_class = TestFactory._REGISTRY.get(test_name.lower())
+        if test_class is None:
             raise ValueError(f"Unknown test name requested: {test_name}")
             
-        return test_class(device_id)
+        return test_class(device_id, duration_sample, will_fail)
 
 
 class AsyncTestRunner:
     """Runs wireless tests on multiple devices concurrently, logging to PostgreSQL, MongoDB & Elasticsearch."""
     
-    def __init__(self, pg_db=None, mongo_db=None, es_db=None):
+    def __init__(self, pg_db=None, mongo_db=None, es_db=None, seed=None):
         self.pg_db = pg_db
         self.mongo_db = mongo_db
         self.es_db = es_db
+        # Seed for the simulated durations/failures; pass an int to make runs reproducible
+        self.seed = seed
 
-    async def _execute_single_test(self, test_name: str, device_id: str) -> dict:
+    async def _execute_single_test(self, test_name: str, device_id: str,
+                                   duration_sample: float, will_fail: bool) -> dict:
         """Wrapper to execute a single test, log database results, and handle exceptions safely."""
         start_time = time.time()
+        # Taken once and threaded through every DB write instead of calling now() per statement
+        ts_start = datetime.datetime.now()
         status = "FAIL"
         error_msg = ""
+        exc_info = None
         
         # 1. Update device status to RUNNING in PostgreSQL at the very beginning
+        # psycopg2 is blocking, so PG round-trips run in a worker thread to keep the event loop free
         if self.pg_db:
             try:
-                self.pg_db.update_device_status(device_id, "RUNNING")
+                await asyncio.to_thread(self.pg_db.update_device_status, device_id, "RUNNING", ts_start)
             except Exception as e:
                 logging.error(f"PG Update Error: {e}")
 
         try:
             # 2. Factory creates the correct test type based on the string name
-            test_instance = TestFactory.create_test(test_name, device_id)
+            test_instance = TestFactory.create_test(test_name, device_id, duration_sample, will_fail)
             
             # 3. Await the specific test's execution method
             result = await test_instance.run()
@@ -94,8 +117,8 @@ class AsyncTestRunner:
         except Exception as e:
             # 4. Handle exceptions gracefully without tearing down the entire runner loop
             error_msg = str(e)
-            # Capture the full stack trace for Elasticsearch full-text search
-            stack_trace = traceback.format_exc()
+            # Keep the raw exception; the stack trace is only formatted if Elasticsearch will index it
+            exc_info = (type(e), e, e.__traceback__)
             print(f"❌ [FAILED] Test '{test_name}' on device '{device_id}' failed: {type(e).__name__}({e})")
             result = {
                 "status": "FAIL", 
@@ -106,33 +129,33 @@ class AsyncTestRunner:
             
         duration = time.time() - start_time
         result["duration"] = duration
+        ts_end = ts_start + datetime.timedelta(seconds=duration)
 
         # 5. DB Cleanup: Write post-test results to PostgreSQL
         if self.pg_db:
             try:
-                # Add to 'tests' & 'results' postgres table
-                self.pg_db.log_result(test_name, device_id, status, duration, error_msg)
+                # Queue for the 'tests' & 'results' postgres tables (flushed in run_all)
+                self.pg_db.log_result(test_name, device_id, status, duration, error_msg, ts_end)
                 # Ensure device status is released back to AVAILABLE since device is idle
-                self.pg_db.update_device_status(device_id, "AVAILABLE")
+                await asyncio.to_thread(self.pg_db.update_device_status, device_id, "AVAILABLE", ts_end)
             except Exception as e:
                 logging.error(f"PostgreSQL logging error: {e}")
 
         # 6. DB Cleanup: Write raw document logs to MongoDB
         if self.mongo_db:
             try:
-                timestamp = datetime.datetime.now()
-                self.mongo_db.write_log(test_name, device_id, status, duration, error_msg, timestamp)
+                self.mongo_db.write_log(test_name, device_id, status, duration, error_msg, ts_end)
             except Exception as e:
                 logging.error(f"MongoDB logging error: {e}")
         # 7. ELK: Index the log into Elasticsearch for full-text search via Kibana
         if self.es_db:
             try:
-                timestamp = datetime.datetime.now()
-                # stack_trace is only populated on failures (captured in the except block)
+                # exc_info is only populated on failures (captured in the except block)
+                stack_trace = "".join(traceback.format_exception(*exc_info)) if exc_info else ''
                 self.es_db.index_log(
                     test_name, device_id, status, duration, 
-                    error_msg, stack_trace if status == 'FAIL' else '',
-                    timestamp
+                    error_msg, stack_trace,
+                    ts_end
                 )
             except Exception as e:
                 logging.error(f"Elasticsearch logging error: {e}")
@@ -143,13 +166,41 @@ class AsyncTestRunner:
         """Runs all test/device combination tasks concurrently using asyncio.gather()."""
         print(f"🚀 Dispatching {len(test_requests)} tests to physical devices concurrently...")
         
+        # Draw every test's simulated duration and failure outcome up front in two vectorized calls
+        rng = np.random.default_rng(self.seed)
+        duration_samples = rng.random(len(test_requests))
+        failures = rng.random(len(test_requests)) < FAILURE_RATE
+
         # Build the coroutine array
         tasks = [
-            self._execute_single_test(test_name, device_id) 
-            for test_name, device_id in test_requests
+            self._execute_single_test(test_name, device_id, float(sample), bool(will_fail)) 
+            for (test_name, device_id), sample, will_fail in zip(test_requests, duration_samples, failures)
         ]
         
         # Gather will execute them independently in the event loop multiplexing IO operations
         results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Write every buffered result/log in one batch per database now that all tests are done
+        await self._flush_all()
+
         print(f"🏁 All {len(test_requests)} test executions have concluded.")
         return list(results)
+
+    async def _flush_all(self):
+        """Flushes the PostgreSQL, MongoDB and Elasticsearch buffers concurrently, logging any failures."""
+        flushes = []
+        if self.pg_db:
+            flushes.append(("PostgreSQL", self.pg_db.flush_results))
+        if self.mongo_db:
+            flushes.append(("MongoDB", self.mongo_db.flush))
+        if self.es_db:
+            flushes.append(("Elasticsearch", self.es_db.flush))
+
+        # The three writes are independent, so total time is the slowest flush rather than the sum
+        outcomes = await asyncio.gather(
+            *(asyncio.to_thread(flush) for _, flush in flushes),
+            return_exceptions=True
+        )
+        for (name, _), outcome in zip(flushes, outcomes):
+            if isinstance(outcome, Exception):
+                logging.error(f"{name} flush error: {outcome}")